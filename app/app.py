@@ -1,17 +1,27 @@
 import streamlit as st
-from datetime import datetime, timedelta
+import csv
+from datetime import datetime, timedelta, timezone
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 import os
+import io
 import numpy as np
+from utils.styles import CSS_DARK, CSS_LIGHT
 
 st.set_page_config(page_title="FocusFlow - Smart Study Tracker", layout="wide")
 
+# Asia/Kolkata has no DST, so a fixed offset avoids a tz database lookup per call
+KOLKATA = timezone(timedelta(hours=5, minutes=30), "IST")
+
 try:
-    from zoneinfo import ZoneInfo
-    KOLKATA = ZoneInfo("Asia/Kolkata")
+    # Optional: faster CSV parsing and the Parquet log snapshot
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+    HAVE_PYARROW = True
 except ImportError:
-    KOLKATA = None
+    HAVE_PYARROW = False
 
 # Ensure the data directory exists
 os.makedirs("data", exist_ok=True)
@@ -20,17 +30,207 @@ os.makedirs("data", exist_ok=True)
 # 1. ALL FUNCTION DEFINITIONS
 # =====================================================================
 
+LOG_COLUMNS = [
+    "Date", "Subject", "Topic", "Start Time", "End Time",
+    "Planned End Time", "Hours", "Productivity", "Start Mood",
+    "End Mood", "Notes", "Timestamp"
+]
+
+SUBJECTS = ["DSA", "Development", "DS", "GATE"]
+MOODS = ["Focus Mode", "Calm", "Motivated", "Lofi", "Stressed", "Tired", "Happy"]
+
+def _normalize_entry(entry):
+    """Coerces one session dict to the log schema so readers can trust its dtypes."""
+    row = dict(entry)
+    row["Date"] = pd.Timestamp(row["Date"]).strftime("%Y-%m-%d")
+    row["Hours"] = round(float(row["Hours"]), 2)
+    row["Productivity"] = int(row["Productivity"])
+    if row["Subject"] not in SUBJECTS:
+        raise ValueError(f"Unknown subject: {row['Subject']!r}")
+    for col in ("Start Mood", "End Mood"):
+        if row[col] not in MOODS:
+            raise ValueError(f"Unknown {col.lower()}: {row[col]!r}")
+    return row
+
 def save_session_to_csv(entry_dict, filename="data/study_logs.csv"):
 	"""Append one session dict to CSV (create file with header if missing)."""
-	os.makedirs(os.path.dirname(filename), exist_ok=True)
-	df_new = pd.DataFrame([entry_dict])
-	write_header = not os.path.exists(filename) or os.path.getsize(filename) == 0
-	df_new.to_csv(filename, mode='a', header=write_header, index=False)
-
-
-def apply_plotly_theme(fig):
-    """Applies the correct Plotly theme based on the session state."""
-    if st.session_state.get("dark_mode", False):
+	save_sessions_to_csv([entry_dict], filename)
+
+
+def save_sessions_to_csv(entries, filename="data/study_logs.csv"):
+	"""Append several session dicts with a single buffered csv.writer pass."""
+	# Normalize first so a rejected entry leaves the file and the header flag untouched
+	rows = [[row.get(col, "") for col in LOG_COLUMNS] for row in map(_normalize_entry, entries)]
+	# Only stat the file on the first write of a session; afterwards it has a header
+	checked = st.session_state.setdefault("_logs_file_has_header", set())
+	if filename in checked:
+		write_header = False
+	else:
+		os.makedirs(os.path.dirname(filename), exist_ok=True)
+		write_header = not os.path.exists(filename) or os.path.getsize(filename) == 0
+	# This session's in-memory log is only extended if it matched the file before the write;
+	# another session may have appended since this one last read it
+	cached = st.session_state.get("log_cache")
+	in_sync = (cached is not None and cached[0] == filename and not write_header
+		and cached[1] == _log_stamp(filename))
+	with open(filename, "a", newline="", encoding="utf-8", buffering=1 << 16) as f:
+		writer = csv.writer(f)
+		if write_header:
+			writer.writerow(LOG_COLUMNS)
+		writer.writerows(rows)
+	checked.add(filename)
+	if in_sync:
+		df = _append_rows(cached[2], rows)
+		st.session_state["log_cache"] = (filename, _log_stamp(filename), df)
+	else:
+		st.session_state.pop("log_cache", None)
+
+
+# Typed columns let the C parser do all conversion in a single pass
+LOG_DTYPES = {
+    "Hours": "float32", "Productivity": "Int8",
+    "Subject": "category", "Start Mood": "category"
+}
+LOG_PARSE_DATES = ["Date"]
+LOG_NUMERIC_COLUMNS = ("Hours", "Productivity")
+
+# Columns the app reads back, in file order; topic, notes, planned end, end mood
+# and the save timestamp are written for the record but never charted
+LOG_READ_COLUMNS = ["Date", "Subject", "Start Time", "End Time", "Hours", "Productivity", "Start Mood"]
+
+if HAVE_PYARROW:
+    # Same schema for pyarrow; clock times stay strings so they aren't inferred as time32
+    _ARROW_CATEGORY = pa.dictionary(pa.int32(), pa.string())
+    ARROW_LOG_TYPES = {
+        "Date": pa.timestamp("ns"), "Hours": pa.float32(), "Productivity": pa.int8(),
+        "Subject": _ARROW_CATEGORY, "Start Mood": _ARROW_CATEGORY,
+        "Start Time": pa.string(), "End Time": pa.string()
+    }
+
+def _read_log_csv(path):
+    """Parses the CSV log with typed columns, via pyarrow's multithreaded reader when available."""
+    if HAVE_PYARROW:
+        try:
+            table = pacsv.read_csv(path, convert_options=pacsv.ConvertOptions(
+                column_types=ARROW_LOG_TYPES, include_columns=LOG_READ_COLUMNS, strings_can_be_null=True))
+            return table.to_pandas(types_mapper={pa.int8(): pd.Int8Dtype()}.get)
+        except (pa.ArrowInvalid, pa.ArrowKeyError):
+            pass  # malformed values or an older column set: fall back to pandas, which coerces them
+    if hasattr(path, "seek"):
+        path.seek(0)  # pyarrow may have consumed the buffer
+    # The numeric columns are read untyped so a stray non-number becomes NaN instead of raising
+    df = pd.read_csv(path, encoding="utf-8-sig", usecols=lambda col: col in LOG_READ_COLUMNS,
+                     parse_dates=LOG_PARSE_DATES,
+                     dtype={col: kind for col, kind in LOG_DTYPES.items() if col not in LOG_NUMERIC_COLUMNS})
+    for col in LOG_NUMERIC_COLUMNS:
+        if col not in df.columns:
+            continue
+        values = pd.to_numeric(df[col], errors="coerce")
+        dtype = pd.api.types.pandas_dtype(LOG_DTYPES[col])
+        if pd.api.types.is_integer_dtype(dtype):
+            # Fractional or out-of-range values would make the integer cast raise
+            info = np.iinfo(dtype.numpy_dtype)
+            values = values.where(values.between(info.min, info.max) & (values % 1 == 0))
+        df[col] = values.astype(dtype)
+    return df
+
+def _log_stamp(path):
+    """(mtime in ns, size) of the log; appends within one mtime tick still change the size."""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+# Parquet metadata key holding the "mtime_ns:size" stamp of the CSV a snapshot was parsed from
+SNAPSHOT_SOURCE_KEY = b"focusflow.source"
+
+def _snapshot_path(path):
+    """Parquet snapshot that sits next to a CSV log, e.g. data/study_logs.parquet."""
+    return os.path.splitext(path)[0] + ".parquet"
+
+def _parse_clock(day, clock):
+    """Combines "YYYY-MM-DD " prefixes with HH:MM clock times, also accepting HH:MM:SS."""
+    dt = pd.to_datetime(day + clock, format="%Y-%m-%d %H:%M", errors="coerce")
+    retry = dt.isna() & day.notna()
+    if retry.any():
+        # Only the rows the fixed format rejected take the slower per-element parse
+        dt[retry] = pd.to_datetime(day[retry] + clock[retry], format="mixed", errors="coerce")
+    return dt
+
+def _add_session_columns(df):
+    """Coerces Date and derives the day and session timestamp columns the charts use."""
+    if not pd.api.types.is_datetime64_any_dtype(df["Date"]):
+        # parse_dates leaves empty or malformed columns as object dtype
+        df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    df["DateOnly64"] = df["Date"].values.astype("datetime64[D]")
+
+    # Session start/end timestamps for the time-of-day charts
+    if "Start Time" in df.columns and "End Time" in df.columns:
+        # Vectorized zero-padding ("9:05" -> "09:05") and a fixed format keep parsing on the C fast path
+        day = df["Date"].dt.strftime("%Y-%m-%d") + " "
+        df["Start Time"] = df["Start Time"].astype(str).str.strip().str.zfill(5)
+        df["End Time"] = df["End Time"].astype(str).str.strip().str.zfill(5)
+        df["Start_dt"] = _parse_clock(day, df["Start Time"])
+        end = _parse_clock(day, df["End Time"]).to_numpy()
+        # Sessions that end "before" they start ran past midnight; NaT compares False and is kept
+        df["End_dt"] = np.where(end < df["Start_dt"].to_numpy(), end + np.timedelta64(1, "D"), end)
+        df["Start_Hour"] = df["Start_dt"].dt.hour.astype("Int8")  # 0-23, NA where the start is unknown
+    return df
+
+def _append_rows(df, rows):
+    """Returns `df` plus freshly written CSV rows, parsed exactly as the loader would parse them."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(LOG_COLUMNS)
+    writer.writerows(rows)
+    new = _add_session_columns(_read_log_csv(io.BytesIO(buf.getvalue().encode("utf-8"))))
+    if df.empty:
+        return new  # a header-only log has no dtypes worth keeping
+    out = pd.concat([df, new], ignore_index=True)
+    for col in ("Subject", "Start Mood"):
+        # Categoricals with different category sets concatenate to object
+        if col in out.columns and not isinstance(out[col].dtype, pd.CategoricalDtype):
+            out[col] = out[col].astype("category")
+    return out
+
+@st.cache_data(show_spinner=False, ttl=None, max_entries=4)
+def _load_logs(path, stamp):
+    """Reads and normalizes the study log, from its Parquet snapshot while that matches `stamp`."""
+    snapshot = _snapshot_path(path)
+    if HAVE_PYARROW and os.path.exists(snapshot):
+        try:
+            fresh = (pq.read_schema(snapshot).metadata or {}).get(SNAPSHOT_SOURCE_KEY) == b"%d:%d" % stamp
+        except (OSError, pa.ArrowInvalid):
+            fresh = False  # unreadable or half-written: rebuild it from the CSV
+        if fresh:
+            df = pd.read_parquet(snapshot)
+            # Parquet has no second resolution and hands the day column back as [ms]
+            df["DateOnly64"] = df["DateOnly64"].astype("datetime64[s]")
+            return df
+
+    df = _add_session_columns(_read_log_csv(path))
+    if HAVE_PYARROW:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        meta = {**(table.schema.metadata or {}), SNAPSHOT_SOURCE_KEY: b"%d:%d" % stamp}
+        try:
+            pq.write_table(table.replace_schema_metadata(meta), snapshot)
+        except OSError:
+            pass  # read-only data dir: keep serving from the CSV
+    return df
+
+def _session_logs(path):
+    """Returns (stamp, frame) for the log, reusing this session's copy while the file is unchanged."""
+    stamp = _log_stamp(path)
+    cached = st.session_state.get("log_cache")
+    if cached is None or cached[:2] != (path, stamp):
+        cached = (path, stamp, _load_logs(path, stamp))
+        st.session_state["log_cache"] = cached
+    return stamp, cached[2]
+
+
+def apply_plotly_theme(fig, dark=None):
+    """Applies the correct Plotly theme based on `dark` (or the session state)."""
+    if dark is None:
+        dark = st.session_state.get("dark_mode", False)
+    if dark:
         fig.update_layout(
             template="plotly_dark",
             paper_bgcolor="rgba(0,0,0,0)",
@@ -52,20 +252,180 @@ def apply_plotly_theme(fig):
         )
     return fig
 
+MAX_LINE_POINTS = 2000
+
+def _lttb(x, y, n_out=MAX_LINE_POINTS):
+    """Downsamples a line with Largest-Triangle-Three-Buckets, keeping its visual shape."""
+    x, y = np.asarray(x), np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return x, y
+    xf = x.astype("datetime64[D]").astype(float) if x.dtype.kind in "OM" else x.astype(float)
+
+    # First and last points are kept; the rest is split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            nxt = slice(edges[i + 1], edges[i + 2])
+            avg_x, avg_y = xf[nxt].mean(), y[nxt].mean()
+        else:
+            avg_x, avg_y = xf[-1], y[-1]
+        # Pick the point forming the largest triangle with the last kept point and the next bucket's mean
+        area = np.abs((xf[a] - avg_x) * (y[lo:hi] - y[a]) - (xf[a] - xf[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return x[keep], y[keep]
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _dashboard_aggs(path, stamp, date_range, _df):
+    """Every Dashboard aggregate in one pass per log version and date range; None where empty."""
+    # `_df` is the frame from _session_logs and isn't hashed; (path, stamp, date_range) key the cache
+    # One mask for the Dashboard's date range and negative hours
+    days = _df["DateOnly64"].to_numpy().astype("datetime64[D]")
+    start, end = (np.datetime64(d, "D") for d in date_range)
+    df = _df[(_df['Hours'] >= 0).to_numpy() & (days >= start) & (days <= end)]
+    per_subject = df.groupby("Subject", observed=True, sort=False)["Hours"].sum()
+    # Stable pie order: known subjects first, then anything older logs still carry
+    order = [s for s in SUBJECTS if s in per_subject.index] + [s for s in per_subject.index if s not in SUBJECTS]
+    aggs = {
+        "daily": df.groupby("DateOnly64", sort=True)["Hours"].sum(),
+        "subject": per_subject.reindex(order),
+        "hourly": None,
+        "prod_hour": None,
+        "prod_mood": None,
+    }
+    if "Start_dt" in df.columns:
+        # Count every clock hour each session touches, from its starting hour through its end
+        starts = df["Start_dt"].to_numpy().astype("datetime64[h]")
+        ends = df["End_dt"].to_numpy().astype("datetime64[h]")
+        ok = ~(np.isnat(starts) | np.isnat(ends))
+        starts = starts[ok].astype(np.int64)
+        spans = np.maximum(ends[ok].astype(np.int64) - starts + 1, 0)
+        # Offsets 0..span-1 for each session, without a Python loop per row
+        offsets = np.arange(spans.sum()) - np.repeat(np.cumsum(spans) - spans, spans)
+        session_hours = (np.repeat(starts, spans) + offsets) % 24
+        if session_hours.size:
+            aggs["hourly"] = np.bincount(session_hours, minlength=24)
+    if "Productivity" in df.columns and "Start_Hour" in df.columns:
+        valid = (df["Start_Hour"].notna() & df["Productivity"].notna()).to_numpy()
+        if valid.any():
+            # Hours are 0-23, so two fixed-size bincounts replace a hash groupby for the means
+            hours = df["Start_Hour"].to_numpy(dtype=np.intp, na_value=0)[valid]
+            scores = df["Productivity"].to_numpy(dtype=np.float64, na_value=0)[valid]
+            sessions = np.bincount(hours, minlength=24)
+            totals = np.bincount(hours, weights=scores, minlength=24)
+            seen = np.flatnonzero(sessions)
+            aggs["prod_hour"] = pd.DataFrame({"Start_Hour": seen, "Productivity": np.round(totals[seen] / sessions[seen], 1)})
+    if "Productivity" in df.columns and "Start Mood" in df.columns and not df.dropna(subset=["Start Mood", "Productivity"]).empty:
+        mood_means = df.groupby("Start Mood", observed=True)["Productivity"].mean().round(1)
+        # Order moods by name first so rounded ties break alphabetically, whatever the category order
+        mood_means = mood_means.sort_index(key=lambda moods: moods.astype(str))
+        aggs["prod_mood"] = mood_means.sort_values(ascending=False, kind="stable").reset_index()
+    return aggs
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _overview_figs(path, stamp, date_range, dark, _df):
+    """Builds the Overview tab figures as plain dicts (None if empty), cached per log version, range and theme."""
+    figs = dict.fromkeys(["daily", "hourly", "subjects", "cumulative"])
+
+    # The charts below plot these small aggregates directly
+    aggs = _dashboard_aggs(path, stamp, date_range, _df)
+    daily = aggs["daily"]
+    cumulative = daily.cumsum()
+    per_subject = aggs["subject"]
+
+    if not daily.empty:
+        x, y = _lttb(daily.index, daily.values)
+        fig = go.Figure(go.Scattergl(x=x, y=y, mode="lines", name="Daily Study Hours"))
+        fig.update_layout(title="Daily Study Hours", xaxis_title="Date", yaxis_title="Hours")
+        figs["daily"] = apply_plotly_theme(fig, dark).to_dict()
+
+    if aggs["hourly"] is not None:
+        fig = go.Figure(go.Bar(x=np.arange(24), y=aggs["hourly"]))
+        fig.update_layout(title="Study Hours by Time of Day", xaxis_title="Hour", yaxis_title="Sessions")
+        figs["hourly"] = apply_plotly_theme(fig, dark).to_dict()
+
+    if not per_subject.empty:
+        # sort=False keeps the SUBJECTS order from _dashboard_aggs; Plotly re-sorts slices by value otherwise
+        fig = go.Figure(go.Pie(labels=per_subject.index, values=per_subject.values, sort=False))
+        fig.update_layout(title="Time Spent per Subject")
+        figs["subjects"] = apply_plotly_theme(fig, dark).to_dict()
+
+    if not cumulative.empty:
+        x, y = _lttb(cumulative.index, cumulative.values)
+        fig = go.Figure(go.Scattergl(x=x, y=y, mode="lines", name="Cumulative Study Time"))
+        fig.update_layout(title="Cumulative Study Time")
+        fig.update_layout(xaxis_title="Date", yaxis_title="Total Cumulative Hours", yaxis_ticksuffix=" hrs", xaxis_tickformat="%d-%b-%Y")
+        figs["cumulative"] = apply_plotly_theme(fig, dark).to_dict()
+    return figs
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _insight_figs(path, stamp, date_range, dark, _df):
+    """Builds the Smart Insights bar charts as plain dicts, cached like _overview_figs."""
+    aggs = _dashboard_aggs(path, stamp, date_range, _df)
+    figs = dict.fromkeys(["prod_hour", "prod_mood"])
+    for key, x in (("prod_hour", "Start_Hour"), ("prod_mood", "Start Mood")):
+        if aggs[key] is not None:
+            fig = px.bar(aggs[key], x=x, y="Productivity", text="Productivity")
+            fig.update_traces(textposition='outside')
+            figs[key] = apply_plotly_theme(fig, dark).to_dict()
+    return figs
+
+@st.cache_data(show_spinner=False)
+def _subject_actuals(path, stamp, _df):
+    """Total logged hours per subject, as a Series indexed by Subject."""
+    return _df.groupby("Subject", observed=True, sort=False)["Hours"].sum()
+
 def _now_kolkata():
-    """Gets the current time in Asia/Kolkata timezone if available."""
-    if KOLKATA:
-        return datetime.now(KOLKATA)
-    return datetime.now()
+    """Gets the current time in the Asia/Kolkata timezone."""
+    return datetime.now(KOLKATA)
 
 def compute_streak(dates_set, today_date):
-    """Counts consecutive study days leading up to today."""
-    streak = 0
-    cur = today_date
-    while cur in dates_set:
-        streak += 1
-        cur = cur - timedelta(days=1)
-    return streak
+    """Counts consecutive study days up to today; `dates_set` holds days since the Unix epoch."""
+    today = int(np.datetime64(today_date, "D").astype(np.int64))
+    if len(dates_set) < 8:
+        # Tiny histories: walking the set is cheaper than building an array
+        streak = 0
+        while today - streak in dates_set:
+            streak += 1
+        return streak
+
+    days = np.sort(np.fromiter(dates_set, dtype=np.int64, count=len(dates_set)))
+    days = days[days <= today]
+    if days.size == 0 or days[-1] != today:
+        return 0
+    # The streak is the trailing run with no gap larger than one day
+    gaps = np.flatnonzero(np.diff(days) != 1)
+    return int(days.size if gaps.size == 0 else days.size - gaps[-1] - 1)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _header_stats(path, stamp, today_date, _df):
+    """Total hours, 7-day hours, streak and top subject, cached per log version and day."""
+    streak, best_subject = 0, "—"
+    df = _df
+
+    # Pull the columns out once and derive every metric from the same arrays
+    hv = df["Hours"].to_numpy(copy=False)
+    dv = df["DateOnly64"].to_numpy(copy=False).astype("datetime64[D]")
+    total_hours = float(np.nansum(hv))
+    week_start64 = np.datetime64(today_date - timedelta(days=6))
+    week_hours = float(np.nansum(hv[dv >= week_start64]))  # NaT compares False
+
+    has_date = ~np.isnat(dv)
+    if has_date.any():
+        # np.unique dedups in C; epoch-day ints hash far faster than date objects
+        dates_set = set(np.unique(dv[has_date].astype(np.int64)).tolist())
+        streak = compute_streak(dates_set, today_date)
+
+    if "Subject" in df.columns and hv.size:
+        per_subj = pd.Series(hv).groupby(df["Subject"].values, observed=True, sort=False).sum()
+        if not per_subj.empty:
+            best_subject = per_subj.idxmax()
+    return total_hours, week_hours, streak, best_subject
 
 st.markdown("# 🎓 FocusFlow - Smart Study Tracker")
 
@@ -85,31 +445,8 @@ def header_section(data_path="data/study_logs.csv", user_name="You"):
 
     if os.path.exists(data_path) and os.path.getsize(data_path) > 0:
         try:
-            df = pd.read_csv(data_path, encoding="utf-8-sig")
-            df.columns = df.columns.str.strip()
-            if "Date" in df.columns:
-                df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-                df["DateOnly"] = df["Date"].dt.date
-            else:
-                df["DateOnly"] = pd.NaT
-            if "Hours" in df.columns:
-                df["Hours"] = pd.to_numeric(df["Hours"], errors="coerce").fillna(0.0)
-            else:
-                df["Hours"] = 0.0
-
-            total_hours = float(df["Hours"].sum())
-            week_start = today_date - timedelta(days=6)
-            df_week = df[df["DateOnly"].notna() & (df["DateOnly"] >= week_start)]
-            week_hours = float(df_week["Hours"].sum())
-
-            if df["DateOnly"].notna().any():
-                dates_set = set(df["DateOnly"].dropna().astype("O"))
-                streak = compute_streak(dates_set, today_date)
-
-            if "Subject" in df.columns and not df.empty:
-                subj = df.groupby("Subject")["Hours"].sum()
-                if not subj.empty:
-                    best_subject = subj.idxmax()
+            stamp, df = _session_logs(data_path)
+            total_hours, week_hours, streak, best_subject = _header_stats(data_path, stamp, today_date, df)
         except Exception:
             pass
 
@@ -126,109 +463,125 @@ def header_section(data_path="data/study_logs.csv", user_name="You"):
     m3.metric("🔥 Streak", f"{streak} days")
     st.markdown(f"**Top subject:** {best_subject}")
 
+def save_active_session():
+    """End-form callback: logs the active session before the script reruns."""
+    sess = st.session_state.active_session
+    if sess is None:
+        return  # form resubmitted after the session was already saved
+    end_dt = datetime.now()
+    total_hours = round((end_dt - sess["start_dt"]).total_seconds() / 3600.0, 2)
+    entry = {
+        "Date": sess["start_dt"].strftime("%Y-%m-%d"), "Subject": sess["subject"],
+        "Topic": sess["topic"], "Start Time": sess["start_time"],
+        "End Time": end_dt.strftime("%H:%M"), "Planned End Time": sess["planned_end_time"],
+        "Hours": total_hours, "Productivity": st.session_state.end_productivity,
+        "Start Mood": sess["start_mood"], "End Mood": st.session_state.end_mood,
+        "Notes": st.session_state.end_notes, "Timestamp": end_dt.strftime("%Y-%m-%d %H:%M:%S")
+    }
+    save_session_to_csv(entry)
+    st.session_state.active_session = None
+    st.session_state.show_end_form = False
+    st.toast("✅ Session saved to data/study_logs.csv")
+
+DASHBOARD_DAYS = 90  # default Dashboard window; the header metrics always use the full log
+
+@st.fragment
+def dashboard():
+    """Renders the Dashboard page; as a fragment, interactions inside it rerun only this function."""
+    st.header("📊 Study Analytics")
+    filename = "data/study_logs.csv"
+
+    if not os.path.exists(filename) or os.path.getsize(filename) == 0:
+        st.info("No study logs found. Start by adding a session on the '📝 Log Study Session' page!")
+    else:
+        # Widgets in a fragment can't go in the sidebar, so the range picker sits on the page;
+        # changing it reruns only this fragment
+        today = _now_kolkata().date()
+        default_start = today - timedelta(days=DASHBOARD_DAYS - 1)
+        picked = st.date_input("🗓️ Date range", value=(default_start, today), key="dashboard_range")
+        # Mid-selection the picker returns one date (or none); keep the range open-ended until then
+        date_range = (picked[0] if picked else default_start, picked[1] if len(picked) > 1 else today)
+
+        # Load and process data once, before the tabs
+        stamp, logs = _session_logs(filename)
+        dark = st.session_state.get("dark_mode", False)
+        figs = _overview_figs(filename, stamp, date_range, dark, logs)
+        aggs = _dashboard_aggs(filename, stamp, date_range, logs)
+        insight_figs = _insight_figs(filename, stamp, date_range, dark, logs)
+
+        # Create the tabs
+        tab1, tab2 = st.tabs(["📈 Overview", "🧠 Smart Insights"])
+
+        with tab1:
+            # --- OVERVIEW CHARTS ---
+            col1, col2 = st.columns([1, 1])
+            with col1:
+                st.subheader("📅 Hours Studied Over Time")
+                if figs["daily"] is not None:
+                    st.plotly_chart(go.Figure(figs["daily"]), use_container_width=True)
+                else: st.info("No 'Hours' data found.")
+
+            with col2:
+                st.subheader("⏱️ Time of Day You Study")
+                if figs["hourly"] is not None:
+                    st.plotly_chart(go.Figure(figs["hourly"]), use_container_width=True)
+                elif "Start_dt" in logs.columns: st.info("No hourly data.")
+                else: st.warning("Start/End Time columns missing.")
+
+            col3, col4 = st.columns([1, 1])
+            with col3:
+                st.subheader("📚 Subjects Studied")
+                if figs["subjects"] is not None:
+                    st.plotly_chart(go.Figure(figs["subjects"]), use_container_width=True)
+                else: st.info("No subject data found.")
+
+            with col4:
+                st.subheader("📈 Cumulative Study Time")
+                if figs["cumulative"] is not None:
+                    st.plotly_chart(go.Figure(figs["cumulative"]), use_container_width=True)
+                else: st.info("No valid data for cumulative time.")
+
+        with tab2:
+            # --- SMART INSIGHTS ---
+            st.subheader("🧠 Smart Insights")
+            c1, c2 = st.columns(2)
+
+            with c1:
+                st.markdown("##### Productivity by Time of Day")
+                if aggs["prod_hour"] is not None:
+                    prod_by_hour = aggs["prod_hour"]
+                    st.plotly_chart(go.Figure(insight_figs["prod_hour"]), use_container_width=True)
+                    if not prod_by_hour.empty:
+                        peak_hour_row = prod_by_hour.loc[prod_by_hour['Productivity'].idxmax()]
+                        peak_hour, peak_prod = int(peak_hour_row['Start_Hour']), peak_hour_row['Productivity']
+                        st.markdown(f"**💡 Recommendation:** Your productivity peaks at **{peak_hour}:00** (avg score: {peak_prod}). Try scheduling your most challenging subjects then!")
+                else:
+                    st.info("Log more sessions with productivity scores to see insights here.")
+
+            with c2:
+                st.markdown("##### Productivity by Starting Mood")
+                if aggs["prod_mood"] is not None:
+                    prod_by_mood = aggs["prod_mood"]
+                    st.plotly_chart(go.Figure(insight_figs["prod_mood"]), use_container_width=True)
+                    if len(prod_by_mood) > 1:
+                        best_mood, worst_mood = prod_by_mood.iloc[0]["Start Mood"], prod_by_mood.iloc[-1]["Start Mood"]
+                        st.markdown(f"**💡 Recommendation:** You're most productive when you feel **{best_mood}**. On days you feel **{worst_mood}**, a warm-up might boost your focus.")
+                else:
+                    st.info("Log more sessions with starting moods to see insights here.")
+
 # =====================================================================
 # 2. APP CONFIG AND EXECUTION FLOW
 # =====================================================================
 
+# Session defaults, set once so the pages below can read them directly
+for key, default in {"active_session": None, "show_end_form": False}.items():
+    st.session_state.setdefault(key, default)
+
 # Step 1: Render the header, which includes the dark mode checkbox
 header_section(data_path="data/study_logs.csv", user_name="Vayu")
 
 # Step 2: Apply the CSS theme based on the session state
-_common_selectors = """
-body, .stMarkdown, .stText, .stMetric, [class*="st-emotion-cache"],
-h1, h2, h3, h4, h5, h6,
-label, input, textarea, select, option,
-div[data-testid="stDataFrame"], .stDataFrame, .st-bq {
-    opacity: 1 !important;
-}
-"""
-
-if st.session_state.get("dark_mode", False):
-    dark_css = f"""
-    <style>
-    @import url('https://fonts.googleapis.com/css2?family=Source+Sans+Pro:wght@400;600;700&display=swap');
-    :root {{ color-scheme: dark; }}
-    body, .stApp, .stMarkdown, .stText, .stMetric, [class*="st-emotion-cache"], h1, h2, h3, h4, h5, h6 {{
-        font-family: 'Source Sans Pro', sans-serif !important;
-    }}
-    .stApp, .block-container, [data-testid="stAppViewContainer"], [data-testid="stHeader"] {{
-        background-color: #0b1220 !important;
-        color: #e6eef3 !important;
-    }}
-    section[data-testid="stSidebar"] {{
-        background-color: #111827 !important;
-        color: #e6eef3 !important;
-    }}
-    {_common_selectors}
-    h1,h2,h3,h4,h5,h6, p, div[data-testid="stMetricLabel"], div[data-testid="stMetricValue"] {{
-        color: #e6eef3 !important;
-        -webkit-text-fill-color: #e6eef3 !important;
-    }}
-    .stButton>button {{
-        background-color: #0ea5a4 !important;
-        color: #001 !important;
-    }}
-
-    /* Input widget backgrounds */
-    div[data-baseweb="base-input"],
-    div[data-baseweb="select"] > div:first-child {{
-        background-color: #111827 !important;
-        border-color: #374151 !important;
-    }}
-
-    /* Text color inside all input widgets */
-    div[data-baseweb="base-input"] input,
-    div[data-baseweb="select"] * {{
-        -webkit-text-fill-color: #e6eef3 !important;
-        color: #e6eef3 !important;
-    }}
-
-    /* Tab styling */
-    button[data-baseweb="tab"] {{
-        border-radius: 8px 8px 0px 0px !important;
-        background-color: transparent !important;
-        color: #e6eef3 !important;
-    }}
-    button[data-baseweb="tab"][aria-selected="true"] {{
-        background-color: #111827 !important;
-        border-bottom: 2px solid #0ea5a4;
-    }}
-
-    /* Plotly chart text */
-    .plotly-graph-div .gtitle, .plotly-graph-div text {{
-        fill: #e6eef3 !important;
-    }}
-    </style>
-    """
-    st.markdown(dark_css, unsafe_allow_html=True)
-else:
-    # --- Light Mode CSS (No changes needed here, but included for completeness) ---
-    light_css = f"""
-    <style>
-    @import url('https://fonts.googleapis.com/css2?family=Source+Sans+Pro:wght@400;600;700&display=swap');
-    :root {{ color-scheme: light; }}
-    body, .stApp, .stMarkdown, .stText, .stMetric, [class*="st-emotion-cache"], h1, h2, h3, h4, h5, h6 {{
-        font-family: 'Source Sans Pro', sans-serif !important;
-    }}
-    .stApp, .block-container, [data-testid="stAppViewContainer"] {{ background-color: #ffffff !important; color: #000000 !important; }}
-    section[data-testid="stSidebar"] {{ background-color: #f9f9f9 !important; color: #000000 !important; }}
-    {_common_selectors}
-    .stButton>button {{ background-color: #0ea5a4 !important; color: #fff !important; }}
-    button[data-baseweb="tab"] {{
-        border-radius: 8px 8px 0px 0px !important;
-        background-color: transparent !important;
-        color: #000000 !important;
-    }}
-    button[data-baseweb="tab"][aria-selected="true"] {{
-        background-color: #F0F2F6 !important;
-        border-bottom: 2px solid #0ea5a4;
-    }}
-    .plotly-graph-div .gtitle, .plotly-graph-div text {{
-        fill: #000000 !important;
-    }}
-    </style>
-    """
-    st.markdown(light_css, unsafe_allow_html=True)
+st.markdown(CSS_DARK if st.session_state.get("dark_mode", False) else CSS_LIGHT, unsafe_allow_html=True)
 
 # Step 3: Render the rest of the app
 
@@ -245,11 +598,11 @@ page = st.sidebar.radio(
 if page == "📝 Log Study Session":
     st.title("📚 FocusFlow - Study Logger")
     st.write("Log your daily study sessions and track your productivity.")
-    if "active_session" not in st.session_state:
+    if st.session_state.active_session is None:
         with st.form("start_session_form", clear_on_submit=True):
             col1, col2 = st.columns([1, 1])
             with col1:
-                subject = st.selectbox("📘 Subject *", ["", "DSA", "Development", "DS", "GATE"])
+                subject = st.selectbox("📘 Subject *", [""] + SUBJECTS)
                 topic = st.text_input("🔖 Topic *")
             with col2:
                 now_t = datetime.now()
@@ -258,7 +611,7 @@ if page == "📝 Log Study Session":
                 planned_end_time = st.time_input("⏳ Planned End Time", value=planned_end_default)
             col3, col4 = st.columns(2)
             with col3:
-                start_mood = st.selectbox("🎵 Mood at start", ["Focus Mode", "Calm", "Motivated", "Lofi", "Stressed", "Tired", "Happy"])
+                start_mood = st.selectbox("🎵 Mood at start", MOODS)
             with col4:
                 st.markdown("⏱️ You'll provide productivity & end-mood when you stop the session")
 
@@ -284,131 +637,16 @@ if page == "📝 Log Study Session":
         if st.button("⏹️ Stop Session and Save"):
             st.session_state.show_end_form = True
 
-        if st.session_state.get("show_end_form", False):
+        if st.session_state.show_end_form:
             st.markdown("### ✅ End Session")
             with st.form("end_session_form"):
-                end_mood = st.selectbox("🎵 Mood at end", ["Focus Mode", "Calm", "Motivated", "Lofi", "Stressed", "Tired", "Happy"], index=0)
-                productivity = st.slider("🚀 Productivity (1-10)", 1, 10, 7)
-                notes = st.text_area("Notes (optional) — what went well / blockers")
-                if st.form_submit_button("💾 Save Session"):
-                    end_dt = datetime.now()
-                    total_hours = round((end_dt - sess["start_dt"]).total_seconds() / 3600.0, 2)
-                    entry = {
-                        "Date": sess["start_dt"].strftime("%Y-%m-%d"), "Subject": sess["subject"],
-                        "Topic": sess["topic"], "Start Time": sess["start_time"],
-                        "End Time": end_dt.strftime("%H:%M"), "Planned End Time": sess["planned_end_time"],
-                        "Hours": total_hours, "Productivity": productivity,
-                        "Start Mood": sess["start_mood"], "End Mood": end_mood,
-                        "Notes": notes, "Timestamp": end_dt.strftime("%Y-%m-%d %H:%M:%S")
-                    }
-                    save_session_to_csv(entry)
-                    st.success("✅ Session saved to data/study_logs.csv")
-                    del st.session_state["active_session"]
-                    if "show_end_form" in st.session_state:
-                        del st.session_state["show_end_form"]
-                    st.rerun()
+                st.selectbox("🎵 Mood at end", MOODS, index=0, key="end_mood")
+                st.slider("🚀 Productivity (1-10)", 1, 10, 7, key="end_productivity")
+                st.text_area("Notes (optional) — what went well / blockers", key="end_notes")
+                st.form_submit_button("💾 Save Session", on_click=save_active_session)
 
 elif page == "📊 Dashboard":
-    st.header("📊 Study Analytics")
-    filename = "data/study_logs.csv"
-
-    if not os.path.exists(filename) or os.path.getsize(filename) == 0:
-        st.info("No study logs found. Start by adding a session on the '📝 Log Study Session' page!")
-    else:
-        # Load and process data once, before the tabs
-        df = pd.read_csv(filename)
-        df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-        df = df[df['Hours'] >= 0] # Filter out negative hours
-
-        if "Start Time" in df.columns and "End Time" in df.columns:
-            df["Start Time"] = df["Start Time"].astype(str).str.strip().apply(lambda x: x.zfill(5) if ":" in x else x)
-            df["End Time"] = df["End Time"].astype(str).str.strip().apply(lambda x: x.zfill(5) if ":" in x else x)
-            df["Start_dt"] = pd.to_datetime(df["Date"].dt.strftime("%Y-%m-%d") + " " + df["Start Time"], errors="coerce")
-            df["End_dt"] = pd.to_datetime(df["Date"].dt.strftime("%Y-%m-%d") + " " + df["End Time"], errors="coerce")
-            df.loc[df["End_dt"] < df["Start_dt"], "End_dt"] += timedelta(days=1)
-
-        # Create the tabs
-        tab1, tab2 = st.tabs(["📈 Overview", "🧠 Smart Insights"])
-
-        with tab1:
-            # --- OVERVIEW CHARTS ---
-            col1, col2 = st.columns([1, 1])
-            with col1:
-                st.subheader("📅 Hours Studied Over Time")
-                if "Hours" in df.columns and not df.empty and df['Date'].notna().any():
-                    chart_data = df.groupby(df["Date"].dt.date)["Hours"].sum().reset_index()
-                    fig = px.line(chart_data, x="Date", y="Hours", title="Daily Study Hours")
-                    st.plotly_chart(apply_plotly_theme(fig), use_container_width=True)
-                else: st.info("No 'Hours' data found.")
-
-            with col2:
-                st.subheader("⏱️ Time of Day You Study")
-                if "Start_dt" in df.columns and not df.dropna(subset=["Start_dt", "End_dt"]).empty:
-                    expanded_hours = [h for _, row in df.dropna(subset=["Start_dt", "End_dt"]).iterrows() for h in pd.date_range(row["Start_dt"].floor('H'), row["End_dt"], freq='H').hour]
-                    if expanded_hours:
-                        hour_data = pd.Series(expanded_hours).value_counts().sort_index().reset_index()
-                        hour_data.columns = ["Hour", "Sessions"]
-                        fig2 = px.bar(hour_data, x="Hour", y="Sessions", title="Study Hours by Time of Day")
-                        st.plotly_chart(apply_plotly_theme(fig2), use_container_width=True)
-                    else: st.info("No hourly data.")
-                else: st.warning("Start/End Time columns missing.")
-
-            col3, col4 = st.columns([1, 1])
-            with col3:
-                st.subheader("📚 Subjects Studied")
-                if "Subject" in df.columns and "Hours" in df.columns and not df.empty:
-                    subject_data = df.groupby("Subject")["Hours"].sum().reset_index()
-                    fig3 = px.pie(subject_data, names="Subject", values="Hours", title="Time Spent per Subject")
-                    st.plotly_chart(apply_plotly_theme(fig3), use_container_width=True)
-                else: st.info("No subject data found.")
-
-            with col4:
-                st.subheader("📈 Cumulative Study Time")
-                if "Hours" in df.columns and "Date" in df.columns and not df.empty:
-                    df_positive_hours = df[df['Hours'] >= 0]
-                    if not df_positive_hours.empty and df_positive_hours["Date"].notna().any():
-                        df_sorted = df_positive_hours.sort_values(by="Date").dropna(subset=["Date", "Hours"])
-                        if not df_sorted.empty:
-                            cumulative = df_sorted.groupby(df_sorted["Date"].dt.date)["Hours"].sum().cumsum().reset_index()
-                            fig4 = px.line(cumulative, x="Date", y="Hours", title="Cumulative Study Time")
-                            fig4.update_layout(xaxis_title="Date", yaxis_title="Total Cumulative Hours", yaxis_ticksuffix=" hrs", xaxis_tickformat="%d-%b-%Y")
-                            st.plotly_chart(apply_plotly_theme(fig4), use_container_width=True)
-                        else: st.info("No valid data for cumulative time.")
-                    else: st.info("No valid data for cumulative time.")
-                else: st.info("No data for cumulative time.")
-
-        with tab2:
-            # --- SMART INSIGHTS ---
-            st.subheader("🧠 Smart Insights")
-            c1, c2 = st.columns(2)
-
-            with c1:
-                st.markdown("##### Productivity by Time of Day")
-                if "Productivity" in df.columns and "Start_dt" in df.columns and not df.dropna(subset=["Start_dt", "Productivity"]).empty:
-                    df["Start_Hour"] = df["Start_dt"].dt.hour
-                    prod_by_hour = df.groupby("Start_Hour")["Productivity"].mean().round(1).reset_index()
-                    fig = px.bar(prod_by_hour, x="Start_Hour", y="Productivity", text="Productivity")
-                    fig.update_traces(textposition='outside')
-                    st.plotly_chart(apply_plotly_theme(fig), use_container_width=True)
-                    if not prod_by_hour.empty:
-                        peak_hour_row = prod_by_hour.loc[prod_by_hour['Productivity'].idxmax()]
-                        peak_hour, peak_prod = int(peak_hour_row['Start_Hour']), peak_hour_row['Productivity']
-                        st.markdown(f"**💡 Recommendation:** Your productivity peaks at **{peak_hour}:00** (avg score: {peak_prod}). Try scheduling your most challenging subjects then!")
-                else:
-                    st.info("Log more sessions with productivity scores to see insights here.")
-
-            with c2:
-                st.markdown("##### Productivity by Starting Mood")
-                if "Productivity" in df.columns and "Start Mood" in df.columns and not df.dropna(subset=["Start Mood", "Productivity"]).empty:
-                    prod_by_mood = df.groupby("Start Mood")["Productivity"].mean().round(1).sort_values(ascending=False).reset_index()
-                    fig = px.bar(prod_by_mood, x="Start Mood", y="Productivity", text="Productivity")
-                    fig.update_traces(textposition='outside')
-                    st.plotly_chart(apply_plotly_theme(fig), use_container_width=True)
-                    if len(prod_by_mood) > 1:
-                        best_mood, worst_mood = prod_by_mood.iloc[0]["Start Mood"], prod_by_mood.iloc[-1]["Start Mood"]
-                        st.markdown(f"**💡 Recommendation:** You're most productive when you feel **{best_mood}**. On days you feel **{worst_mood}**, a warm-up might boost your focus.")
-                else:
-                    st.info("Log more sessions with starting moods to see insights here.")
+    dashboard()
 
 elif page == "📈 Goals":
     st.subheader("🎯 Weekly Study Goals")
@@ -421,10 +659,10 @@ elif page == "📈 Goals":
     log_file = "data/study_logs.csv"
 
     if os.path.exists(log_file) and os.path.getsize(log_file) > 0:
-        log_df = pd.read_csv(log_file)
-        actuals = log_df.groupby("Subject")["Hours"].sum().reset_index()
-        actuals.columns = ["Subject", "ActualHours"]
-        merged = pd.merge(goals_df, actuals, on="Subject", how="left").fillna(0)
+        actuals = _subject_actuals(log_file, *_session_logs(log_file))
+        # A handful of goals: look each one up in the actuals index instead of joining
+        merged = goals_df.fillna(0)  # blank cells from the goal editor count as 0, as before
+        merged["ActualHours"] = merged["Subject"].map(actuals).fillna(0)
     else:
         st.warning("⚠️ No study log found yet. Add logs to see progress.")
         merged = goals_df.copy()
@@ -433,9 +671,17 @@ elif page == "📈 Goals":
     merged["Progress (%)"] = (merged["ActualHours"] / merged["TargetHours"].replace(0, np.inf)) * 100
     merged["Progress (%)"] = merged["Progress (%)"].clip(upper=100).astype(int)
 
-    for _, row in merged.iterrows():
-        st.write(f"**{row['Subject']}** — {row['ActualHours']:.1f}h / {row['TargetHours']:.0f}h")
-        st.progress(row["Progress (%)"])
+    # One horizontal bar chart instead of a write + progress widget per goal
+    if not merged.empty:
+        fig = go.Figure(go.Bar(
+            x=merged["Progress (%)"].to_numpy(), y=merged["Subject"].to_numpy(), orientation="h",
+            text=[f"{a:.1f}h / {t:.0f}h" for a, t in zip(merged["ActualHours"].to_numpy(), merged["TargetHours"].to_numpy())],
+            textposition="auto", marker_color="#0ea5a4"
+        ))
+        fig.update_xaxes(range=[0, 100], ticksuffix="%", title="Progress")
+        fig.update_yaxes(autorange="reversed")  # keep goals in file order, top to bottom
+        fig.update_layout(height=120 + 40 * len(merged), margin=dict(t=20, b=40))
+        st.plotly_chart(apply_plotly_theme(fig), use_container_width=True)
 
     with st.expander("✏️ Edit Goals"):
         edited_df = st.data_editor(goals_df, num_rows="dynamic", use_container_width=True)
@@ -451,13 +697,9 @@ elif page == "⚙️ Settings":
     if st.button("⚠️ Clear All Study Logs", type="primary"):
         log_file = "data/study_logs.csv"
         if os.path.exists(log_file):
-            header_columns = [
-                "Date", "Subject", "Topic", "Start Time", "End Time",
-                "Planned End Time", "Hours", "Productivity", "Start Mood",
-                "End Mood", "Notes", "Timestamp"
-            ]
-            empty_df = pd.DataFrame(columns=header_columns)
+            empty_df = pd.DataFrame(columns=LOG_COLUMNS)
             empty_df.to_csv(log_file, index=False)
+            _load_logs.clear()
             st.success("All study logs have been cleared. The file is now empty.")
             st.rerun()
         else:
@@ -6,10 +6,13 @@ from datetime import datetime
 
 # Define the path where the logs will be saved
 LOG_FILE = "data/study_logs.csv"
+LOG_FIELDS = ["Date", "Subject", "Topic", "Hours", "Productivity", "Mood", "Timestamp"]
+
+# Set once the log is known to have a header, so later appends skip the stat() calls
+_header_written = False
 
 def log_study_entry(subject, topic, hours, productivity, mood, date):
-    # Ensure the data directory exists
-    os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
+    global _header_written
 
     # Format the date
     formatted_date = date.strftime('%Y-%m-%d')
@@ -25,11 +28,16 @@ def log_study_entry(subject, topic, hours, productivity, mood, date):
         "Timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     }
 
-    # Check if file exists to write header if not
-    file_exists = os.path.isfile(LOG_FILE)
+    # Check if file exists (and isn't empty) to write header if not; once per process
+    write_header = False
+    if not _header_written:
+        # Ensure the data directory exists
+        os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
+        write_header = not os.path.isfile(LOG_FILE) or os.path.getsize(LOG_FILE) == 0
+        _header_written = True
 
-    with open(LOG_FILE, mode="a", newline="", encoding="utf-8") as file:
-        writer = csv.DictWriter(file, fieldnames=entry.keys())
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow(entry)
+    with open(LOG_FILE, mode="a", newline="", encoding="utf-8", buffering=1 << 16) as file:
+        writer = csv.writer(file)
+        if write_header:
+            writer.writerow(LOG_FIELDS)
+        writer.writerow([entry[field] for field in LOG_FIELDS])
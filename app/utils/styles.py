@@ -0,0 +1,96 @@
+# utils/styles.py
+
+# Page stylesheets for the light and dark themes. They live in an imported
+# module so they are built once per process instead of on every rerun.
+
+_COMMON_SELECTORS = """
+body, .stMarkdown, .stText, .stMetric, [class*="st-emotion-cache"],
+h1, h2, h3, h4, h5, h6,
+label, input, textarea, select, option,
+div[data-testid="stDataFrame"], .stDataFrame, .st-bq {
+    opacity: 1 !important;
+}
+"""
+
+CSS_DARK = f"""
+<style>
+@import url('https://fonts.googleapis.com/css2?family=Source+Sans+Pro:wght@400;600;700&display=swap');
+:root {{ color-scheme: dark; }}
+body, .stApp, .stMarkdown, .stText, .stMetric, [class*="st-emotion-cache"], h1, h2, h3, h4, h5, h6 {{
+    font-family: 'Source Sans Pro', sans-serif !important;
+}}
+.stApp, .block-container, [data-testid="stAppViewContainer"], [data-testid="stHeader"] {{
+    background-color: #0b1220 !important;
+    color: #e6eef3 !important;
+}}
+section[data-testid="stSidebar"] {{
+    background-color: #111827 !important;
+    color: #e6eef3 !important;
+}}
+{_COMMON_SELECTORS}
+h1,h2,h3,h4,h5,h6, p, div[data-testid="stMetricLabel"], div[data-testid="stMetricValue"] {{
+    color: #e6eef3 !important;
+    -webkit-text-fill-color: #e6eef3 !important;
+}}
+.stButton>button {{
+    background-color: #0ea5a4 !important;
+    color: #001 !important;
+}}
+
+/* Input widget backgrounds */
+div[data-baseweb="base-input"],
+div[data-baseweb="select"] > div:first-child {{
+    background-color: #111827 !important;
+    border-color: #374151 !important;
+}}
+
+/* Text color inside all input widgets */
+div[data-baseweb="base-input"] input,
+div[data-baseweb="select"] * {{
+    -webkit-text-fill-color: #e6eef3 !important;
+    color: #e6eef3 !important;
+}}
+
+/* Tab styling */
+button[data-baseweb="tab"] {{
+    border-radius: 8px 8px 0px 0px !important;
+    background-color: transparent !important;
+    color: #e6eef3 !important;
+}}
+button[data-baseweb="tab"][aria-selected="true"] {{
+    background-color: #111827 !important;
+    border-bottom: 2px solid #0ea5a4;
+}}
+
+/* Plotly chart text */
+.plotly-graph-div .gtitle, .plotly-graph-div text {{
+    fill: #e6eef3 !important;
+}}
+</style>
+"""
+
+CSS_LIGHT = f"""
+<style>
+@import url('https://fonts.googleapis.com/css2?family=Source+Sans+Pro:wght@400;600;700&display=swap');
+:root {{ color-scheme: light; }}
+body, .stApp, .stMarkdown, .stText, .stMetric, [class*="st-emotion-cache"], h1, h2, h3, h4, h5, h6 {{
+    font-family: 'Source Sans Pro', sans-serif !important;
+}}
+.stApp, .block-container, [data-testid="stAppViewContainer"] {{ background-color: #ffffff !important; color: #000000 !important; }}
+section[data-testid="stSidebar"] {{ background-color: #f9f9f9 !important; color: #000000 !important; }}
+{_COMMON_SELECTORS}
+.stButton>button {{ background-color: #0ea5a4 !important; color: #fff !important; }}
+button[data-baseweb="tab"] {{
+    border-radius: 8px 8px 0px 0px !important;
+    background-color: transparent !important;
+    color: #000000 !important;
+}}
+button[data-baseweb="tab"][aria-selected="true"] {{
+    background-color: #F0F2F6 !important;
+    border-bottom: 2px solid #0ea5a4;
+}}
+.plotly-graph-div .gtitle, .plotly-graph-div text {{
+    fill: #000000 !important;
+}}
+</style>
+"""